@@ -63,74 +63,130 @@ def extract_text(html_string):
         return html_string
 
 
-def delete_invoices_not_in_staging(params):
-    """Delete invoices in ABC_Invoices table that aren't in Staging table."""
-    try:
-        # Connect to the database
-        conn = pymysql.connect(**params)
-        cur = conn.cursor()
-
-        # Execute the delete query
-        cur.execute(
-            """
-        DELETE FROM `ABC_Invoices`
-        WHERE `Invoice` NOT IN (SELECT `Invoice` FROM `Staging`);
+def ensure_archive_partition(cur, archive_table, month):
+    """Split a monthly partition for `month` (YYYYMM) off the archive's catch-all partition."""
+    cur.execute(
         """
-        )
-
-        # Commit changes and provide feedback
-        conn.commit()
-        deleted_rows = cur.rowcount
-        cur.close()
-
-        if deleted_rows > 0:
-            st.success(
-                f"Deleted {deleted_rows} invoices from 'ABC_Invoices' that were not in 'Staging'!"
+    SELECT 1 FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME = %s;
+    """,
+        (archive_table, f"p{month}"),
+    )
+    if cur.fetchone() is None:
+        next_month = month + 89 if month % 100 == 12 else month + 1
+        try:
+            cur.execute(
+                f"""
+            ALTER TABLE `{archive_table}` REORGANIZE PARTITION pmax INTO (
+                PARTITION p{month} VALUES LESS THAN ({next_month}),
+                PARTITION pmax VALUES LESS THAN MAXVALUE
+            );
+            """
             )
-        else:
-            st.info("No invoices were deleted.")
-
-    except (Exception, pymysql.DatabaseError) as error:
-        st.error(f"Database Error: {error}")
-    finally:
-        if conn is not None:
-            conn.close()
+        except pymysql.MySQLError as error:
+            # A concurrent reconciliation already added this month's partition
+            if error.args[0] != 1517:
+                raise
 
 
-def delete_quotes_not_in_staging(params):
-    """Delete invoices in Quotes table that aren't in Staging table."""
+def archive_rows_not_in_staging(params, table, staging_table, key):
+    """Move rows of `table` whose `key` isn't in `staging_table` to its month-partitioned archive."""
+    archive_table = f"{table}_Archive"
+    today = date.today()
+    month = today.year * 100 + today.month
+    conn = None
     try:
         # Connect to the database
         conn = pymysql.connect(**params)
         cur = conn.cursor()
 
-        # Execute the delete query
+        # Skip the archive DDL entirely when nothing departed, so no empty
+        # month partitions are created
         cur.execute(
-            """
-        DELETE FROM `Quotes`
-        WHERE `Quote` NOT IN (SELECT `Quote` FROM `Quotes_Staging`);
+            f"""
+        SELECT COUNT(*) FROM `{table}`
+        WHERE `{key}` NOT IN (SELECT `{key}` FROM `{staging_table}`);
         """
         )
+        if cur.fetchone()[0] == 0:
+            cur.close()
+            return 0
 
-        # Commit changes and provide feedback
+        # DDL commits implicitly, so prepare the archive before the move
+        cur.execute(
+            f"""
+        CREATE TABLE IF NOT EXISTS `{archive_table}` (
+            `Archive Month` INT NOT NULL,
+            `Archived At` DATETIME NOT NULL
+        )
+        PARTITION BY RANGE (`Archive Month`) (
+            PARTITION pmax VALUES LESS THAN MAXVALUE
+        )
+        SELECT * FROM `{table}` WHERE 1 = 0;
+        """
+        )
+        ensure_archive_partition(cur, archive_table, month)
+
+        # Copy and delete the departed rows in a single transaction
+        conn.begin()
+        cur.execute(
+            f"""
+        INSERT INTO `{archive_table}`
+        SELECT %s, NOW(), t.* FROM `{table}` t
+        WHERE t.`{key}` NOT IN (SELECT `{key}` FROM `{staging_table}`);
+        """,
+            (month,),
+        )
+        cur.execute(
+            f"""
+        DELETE FROM `{table}`
+        WHERE `{key}` NOT IN (SELECT `{key}` FROM `{staging_table}`);
+        """
+        )
+        archived_rows = cur.rowcount
         conn.commit()
-        deleted_rows = cur.rowcount
         cur.close()
-
-        if deleted_rows > 0:
-            st.success(
-                f"Deleted {deleted_rows} invoices from 'Quotes' that were not in 'Quotes_Staging'!"
-            )
-        else:
-            st.info("No quotes were deleted.")
+        return archived_rows
 
     except (Exception, pymysql.DatabaseError) as error:
+        if conn is not None:
+            try:
+                conn.rollback()
+            except pymysql.Error:
+                pass
         st.error(f"Database Error: {error}")
+        return None
     finally:
         if conn is not None:
             conn.close()
 
 
+def archive_invoices_not_in_staging(params):
+    """Archive invoices in ABC_Invoices table that aren't in Staging table."""
+    archived_rows = archive_rows_not_in_staging(
+        params, "ABC_Invoices", "Staging", "Invoice"
+    )
+    if archived_rows:
+        st.success(
+            f"Archived {archived_rows} invoices from 'ABC_Invoices' that were not in 'Staging'!"
+        )
+    elif archived_rows == 0:
+        st.info("No invoices were archived.")
+
+
+def archive_quotes_not_in_staging(params):
+    """Archive quotes in Quotes table that aren't in Quotes_Staging table."""
+    archived_rows = archive_rows_not_in_staging(
+        params, "Quotes", "Quotes_Staging", "Quote"
+    )
+    if archived_rows:
+        st.success(
+            f"Archived {archived_rows} quotes from 'Quotes' that were not in 'Quotes_Staging'!"
+        )
+    elif archived_rows == 0:
+        st.info("No quotes were archived.")
+
+
 def insert_new_invoices(params):
     """Insert new invoices from Staging table into ABC_Invoices table."""
     try:
@@ -199,6 +255,107 @@ def insert_new_quotes(params):
             conn.close()
 
 
+def fetch_changed_customers(params):
+    """Return customers whose invoices differ between Staging and ABC_Invoices."""
+    conn = None
+    try:
+        conn = pymysql.connect(**params)
+        cur = conn.cursor()
+        cur.execute(
+            """
+        SELECT COALESCE(`Customer Name`, '') FROM `ABC_Invoices`
+        WHERE `Invoice` NOT IN (SELECT `Invoice` FROM `Staging`)
+        UNION
+        SELECT COALESCE(`Customer Name`, '') FROM `Staging`
+        WHERE `Invoice` NOT IN (SELECT `Invoice` FROM `ABC_Invoices`);
+        """
+        )
+        customers = [row[0] for row in cur.fetchall()]
+        cur.close()
+        return customers
+    except (Exception, pymysql.DatabaseError) as error:
+        st.error(f"Database Error: {error}")
+        return None
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+AGING_SUMMARY_SELECT = """
+SELECT
+    COALESCE(`Customer Name`, '') AS `Customer Name`,
+    CASE
+        WHEN `Due Date` IS NULL THEN 'Undated'
+        WHEN DATEDIFF(CURDATE(), `Due Date`) < 0 THEN 'Current'
+        WHEN DATEDIFF(CURDATE(), `Due Date`) <= 30 THEN '0-30'
+        WHEN DATEDIFF(CURDATE(), `Due Date`) <= 60 THEN '31-60'
+        WHEN DATEDIFF(CURDATE(), `Due Date`) <= 90 THEN '61-90'
+        ELSE '90+'
+    END AS `Bucket`,
+    COUNT(*) AS `Invoices`,
+    COALESCE(SUM(`Total Amount`), 0) AS `Total Amount`,
+    SUM(COALESCE(TRIM(`Note`), '') <> '') AS `Contacted`,
+    CURDATE() AS `As Of`
+FROM `ABC_Invoices`
+"""
+
+AGING_BUCKETS = ["Current", "0-30", "31-60", "61-90", "90+", "Undated"]
+
+
+def refresh_aging_summary(params, customers=None):
+    """Refresh the Aging_Summary table from ABC_Invoices.
+
+    Only the given customers are recomputed. Passing None, or a summary built on
+    an earlier day (buckets shift daily), rebuilds the whole table.
+    """
+    conn = None
+    try:
+        conn = pymysql.connect(**params)
+        cur = conn.cursor()
+        cur.execute(
+            """
+        CREATE TABLE IF NOT EXISTS `Aging_Summary` (
+            `Customer Name` VARCHAR(255) NOT NULL,
+            `Bucket` VARCHAR(10) NOT NULL,
+            `Invoices` INT NOT NULL,
+            `Total Amount` DECIMAL(14, 2) NOT NULL,
+            `Contacted` INT NOT NULL,
+            `As Of` DATE NOT NULL,
+            PRIMARY KEY (`Customer Name`, `Bucket`)
+        );
+        """
+        )
+        # Compare in SQL so the check uses the same clock as CURDATE() in the summary
+        cur.execute("SELECT MIN(`As Of`) = CURDATE() FROM `Aging_Summary`")
+        if not cur.fetchone()[0]:
+            customers = None
+
+        if customers is None:
+            cur.execute("DELETE FROM `Aging_Summary`")
+            cur.execute(
+                f"INSERT INTO `Aging_Summary` {AGING_SUMMARY_SELECT}"
+                "GROUP BY 1, 2"
+            )
+        elif customers:
+            customers = tuple(customers)
+            cur.execute(
+                "DELETE FROM `Aging_Summary` WHERE `Customer Name` IN %s",
+                (customers,),
+            )
+            cur.execute(
+                f"INSERT INTO `Aging_Summary` {AGING_SUMMARY_SELECT}"
+                "WHERE COALESCE(`Customer Name`, '') IN %s GROUP BY 1, 2",
+                (customers,),
+            )
+        conn.commit()
+        cur.close()
+    except (Exception, pymysql.DatabaseError) as error:
+        st.error(f"Database Error: {error}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+
 def load_df_to_staging(df, database_name):
     """Load a DataFrame to the 'Staging' table in the database."""
     try:
@@ -227,51 +384,130 @@ def connect_to_db(params):
         return None
 
 
-def fetch_all_invoices(params):
+def fetch_all_quotes(params):
     engine = connect_to_db(params)
     if engine:
         try:
             df = pd.read_sql(
-                f"SELECT `Invoice` FROM `ABC_Invoices` order by `Due Date` asc", engine
+                f"SELECT `Quote` FROM `Quotes` order by `Quote` asc", engine
             )
             return df
         except Exception as e:
-            st.error(f"Error fetching all invoices: {e}")
+            st.error(f"Error fetching all quotes: {e}")
             return None
 
 
-def fetch_all_quotes(params):
+def fetch_all_quotes_data(params):
+    engine = connect_to_db(params)
+    if engine:
+        try:
+            df = pd.read_sql(f"SELECT * FROM `Quotes`", engine)
+            return df
+        except Exception as e:
+            st.error(f"Error fetching all data: {e}")
+            return None
+
+
+def fetch_archive_months(table, params):
+    """Return the months (YYYYMM) present in the archive of `table`, newest first."""
     engine = connect_to_db(params)
     if engine:
         try:
+            # Each month gets a p<YYYYMM> partition, so read the months from the
+            # partition metadata instead of scanning the archive itself
             df = pd.read_sql(
-                f"SELECT `Quote` FROM `Quotes` order by `Quote` asc", engine
+                """
+                SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                    AND PARTITION_NAME <> 'pmax'
+                """,
+                engine,
+                params=(f"{table}_Archive",),
             )
-            return df
+            months = [int(name[1:]) for name in df["PARTITION_NAME"]]
+            return sorted(months, reverse=True)
         except Exception as e:
-            st.error(f"Error fetching all quotes: {e}")
+            st.error(f"Error fetching archive months: {e}")
             return None
 
 
-def fetch_all_quotes_data(params):
+def fetch_archive_count(table, month, params):
+    """Return the number of archived rows of `table` for `month`."""
     engine = connect_to_db(params)
     if engine:
         try:
-            df = pd.read_sql(f"SELECT * FROM `Quotes`", engine)
-            return df
+            # Filtering on `Archive Month` keeps the query to a single partition
+            total = pd.read_sql(
+                f"SELECT COUNT(*) AS `Rows` FROM `{table}_Archive` WHERE `Archive Month`=%s",
+                engine,
+                params=(month,),
+            )
+            return int(total.iloc[0]["Rows"])
         except Exception as e:
-            st.error(f"Error fetching all data: {e}")
+            st.error(f"Error counting archived records: {e}")
             return None
 
 
-def fetch_all_data(params):
+def fetch_archive_page(table, key, month, page, page_size, params):
+    """Return one page of the archive of `table` for `month`, ordered by `Archived At` then `key`."""
     engine = connect_to_db(params)
     if engine:
         try:
-            df = pd.read_sql(f"SELECT * FROM `ABC_Invoices`", engine)
+            df = pd.read_sql(
+                f"SELECT * FROM `{table}_Archive` WHERE `Archive Month`=%s "
+                f"order by `Archived At` desc, `{key}` asc LIMIT %s OFFSET %s",
+                engine,
+                params=(month, page_size, (page - 1) * page_size),
+            )
             return df
         except Exception as e:
-            st.error(f"Error fetching all data: {e}")
+            st.error(f"Error fetching archived records: {e}")
+            return None
+
+
+def fetch_aging_report(params):
+    """Return the bucket totals, customer totals and contact coverage from Aging_Summary."""
+    engine = connect_to_db(params)
+    if engine:
+        try:
+            bucket_order = ", ".join(f"'{bucket}'" for bucket in AGING_BUCKETS)
+            buckets = pd.read_sql(
+                f"""
+                SELECT `Bucket`, SUM(`Invoices`) AS `Invoices`,
+                    SUM(`Total Amount`) AS `Total Amount`, SUM(`Contacted`) AS `Contacted`
+                FROM `Aging_Summary`
+                GROUP BY `Bucket`
+                ORDER BY FIELD(`Bucket`, {bucket_order})
+                """,
+                engine,
+            )
+            bucket_columns = ", ".join(
+                f"SUM(CASE WHEN `Bucket` = '{bucket}' THEN `Total Amount` ELSE 0 END) AS `{bucket}`"
+                for bucket in AGING_BUCKETS
+            )
+            customers = pd.read_sql(
+                f"""
+                SELECT `Customer Name`, {bucket_columns},
+                    SUM(`Total Amount`) AS `Total Amount`, SUM(`Invoices`) AS `Invoices`,
+                    SUM(`Contacted`) AS `Contacted`
+                FROM `Aging_Summary`
+                GROUP BY `Customer Name`
+                ORDER BY `Total Amount` DESC
+                """,
+                engine,
+            )
+            coverage = pd.read_sql(
+                """
+                SELECT SUM(`Invoices`) AS `Invoices`, SUM(`Contacted`) AS `Contacted`,
+                    SUM(`Invoices`) - SUM(`Contacted`) AS `Not Contacted`,
+                    ROUND(100 * SUM(`Contacted`) / NULLIF(SUM(`Invoices`), 0), 1) AS `Coverage`
+                FROM `Aging_Summary`
+                """,
+                engine,
+            )
+            return buckets, customers, coverage
+        except Exception as e:
+            st.error(f"Error fetching the aging report: {e}")
             return None
 
 
@@ -350,6 +586,7 @@ def update_invoice(invoice_id, note, action_date, _params):
     finally:
         if conn is not None:
             conn.close()
+    return updated_rows
 
 
 def update_quote(invoice_id, note, action_date, _params):
@@ -388,6 +625,14 @@ def save_to_excel(data):
     return output.getvalue()
 
 
+def save_report_to_excel(sheets):
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        for sheet_name, data in sheets.items():
+            data.to_excel(writer, sheet_name=sheet_name, index=False)
+    return output.getvalue()
+
+
 def app_past_due_invoices():
     st.title("Past Due Invoices")
 
@@ -434,9 +679,12 @@ def app_past_due_invoices():
                     load_df_to_staging(df, "Staging")
                     st.success("Uploaded successfully to the database!")
                     sleep(2)
-                    delete_invoices_not_in_staging(abc_params)
+                    changed_customers = fetch_changed_customers(abc_params)
+                    archive_invoices_not_in_staging(abc_params)
                     sleep(2)
                     insert_new_invoices(abc_params)
+                    refresh_aging_summary(abc_params, changed_customers)
+                    clear_invoice_cache()
                 df["Invoice"] = df["Invoice"].apply(lambda x: "{:.0f}".format(x))
                 # st.dataframe(df)  # Moved printing the table after the upload process
                 df["Due Date"] = df["Due Date"].apply(format_date)
@@ -577,7 +825,7 @@ def app_quotes_update():
                     load_df_to_staging(df, "Quotes_Staging")
                     st.success("Uploaded successfully to the database!")
                     sleep(2)
-                    delete_quotes_not_in_staging(abc_params)
+                    archive_quotes_not_in_staging(abc_params)
                     sleep(2)
                     insert_new_quotes(abc_params)
 
@@ -592,121 +840,288 @@ def app_quotes_update():
             )
 
 
-def app_invoices_management():
-    st.title("Invoice Management")
+# Seconds before cached invoice data is re-read, so changes made outside this
+# process (another instance, a manual fix) eventually show up.
+INVOICE_CACHE_TTL = 300
 
-    all_invoices = fetch_all_invoices(abc_params)
-    if all_invoices is not None:
-        invoice_options = all_invoices["Invoice"].tolist()
 
-        selected_invoice_id = st.selectbox("**Choose an invoice**", invoice_options)
+@st.cache_data(ttl=INVOICE_CACHE_TTL, show_spinner=False)
+def load_invoice_options(_params):
+    """Cached invoice list for the editor selectbox, cleared when the data changes.
 
-        data = fetch_invoice(selected_invoice_id, abc_params)
-        if data is not None:
-            col1, col2, col3 = st.columns([15, 65, 20])
+    Errors are raised rather than returned so that a failed read is never cached.
+    """
+    engine = connect_to_db(_params)
+    return pd.read_sql(
+        "SELECT `Invoice` FROM `ABC_Invoices` order by `Due Date` asc", engine
+    )
 
-            with col1:
-                styled_box = f"<div style='background-color: white; padding: 5px; border: 2px solid blue; color: blue; display: inline-block;'>{selected_invoice_id}</div>"
-                st.write(
-                    f"<p style='display: inline;'><b>Invoice:</b> {styled_box}</p>",
-                    unsafe_allow_html=True,
-                )
 
-            with col2:
-                styled_box = f"<div style='background-color: white; padding: 5px; border: 2px solid blue; color: blue; display: inline-block;'>{data['Customer Name']}</div>"
-                st.write(
-                    f"<p style='display: inline;'><b>Customer:</b> {styled_box}</p>",
-                    unsafe_allow_html=True,
-                )
+@st.cache_data(ttl=INVOICE_CACHE_TTL, show_spinner=False)
+def load_invoice_records(_params):
+    """Cached, display-formatted ABC_Invoices rows, cleared when the data changes.
 
-            with col3:
-                try:
-                    action_date = st.date_input(
-                        "**Action Date**", pd.to_datetime(data["Action Date"])
-                    )
-                except:
-                    placeholder_date = date.today() + timedelta(days=90)
-                    action_date = st.date_input("Action Date", placeholder_date)
-                    st.warning(
-                        "Action date automatically changed to 3 months from today, updated as needed"
-                    )
+    Errors are raised rather than returned so that a failed read is never cached.
+    """
+    engine = connect_to_db(_params)
+    all_data = pd.read_sql("SELECT * FROM `ABC_Invoices`", engine)
+    all_data.sort_values(by="Action Date", ascending=False, inplace=True)
+    all_data["Invoice"] = all_data["Invoice"].apply(lambda x: "{:.0f}".format(x))
+    all_data["Action Date"] = all_data["Action Date"].apply(format_date)
+    all_data["Due Date"] = all_data["Due Date"].apply(format_date)
+    return all_data
+
+
+@st.cache_data(ttl=INVOICE_CACHE_TTL, show_spinner=False)
+def load_invoice_grid_options(_params):
+    all_data = load_invoice_records(_params)
+    builder = GridOptionsBuilder.from_dataframe(all_data)
+    # Configure the column definitions for the GridOptionsBuilder instance.
+    builder.configure_column("Invoice", width=100)
+    builder.configure_column("Due Date", width=100)
+    builder.configure_column("Note", width=400)
+    builder.configure_column("Rows", width=80)
+    builder.configure_column("Action Date", width=120)
+    builder.configure_column("PO Number", width=150)
+    builder.configure_column("Total Amount", width=125)
+
+    # Build the GridOptions object.
+    return builder.build()
+
+
+@st.cache_data(ttl=INVOICE_CACHE_TTL, show_spinner=False)
+def load_invoice_records_excel(_params):
+    return save_to_excel(load_invoice_records(_params))
+
+
+def clear_invoice_cache():
+    """Invalidate the cached invoice data so the header and grid are rebuilt."""
+    load_invoice_options.clear()
+    load_invoice_records.clear()
+    load_invoice_grid_options.clear()
+    load_invoice_records_excel.clear()
+
+
+@st.fragment
+def invoice_editor():
+    if "invoice_updated" in st.session_state:
+        st.success(st.session_state.pop("invoice_updated"))
 
-            note = st.text_area(
-                "**Enter a Note - Initials, Date, Note -- Add Each Note on a Separate Line!**",
-                data["Note"],
+    try:
+        all_invoices = load_invoice_options(abc_params)
+    except Exception as e:
+        st.error(f"Error fetching all invoices: {e}")
+        return
+    invoice_options = all_invoices["Invoice"].tolist()
+
+    selected_invoice_id = st.selectbox("**Choose an invoice**", invoice_options)
+
+    data = fetch_invoice(selected_invoice_id, abc_params)
+    if data is not None:
+        col1, col2, col3 = st.columns([15, 65, 20])
+
+        with col1:
+            styled_box = f"<div style='background-color: white; padding: 5px; border: 2px solid blue; color: blue; display: inline-block;'>{selected_invoice_id}</div>"
+            st.write(
+                f"<p style='display: inline;'><b>Invoice:</b> {styled_box}</p>",
+                unsafe_allow_html=True,
             )
-            m = st.markdown(
-                """
-                        <style>
-                        div.stButton > button:first-child {
-                            background-color: #0099ff;
-                            color:#ffffff;
-                        }
-                        div.stButton > button:hover {
-                            background-color: #00ff00;
-                            color:#ff0000;
-                            }
-                        </style>""",
+
+        with col2:
+            styled_box = f"<div style='background-color: white; padding: 5px; border: 2px solid blue; color: blue; display: inline-block;'>{data['Customer Name']}</div>"
+            st.write(
+                f"<p style='display: inline;'><b>Customer:</b> {styled_box}</p>",
                 unsafe_allow_html=True,
             )
-            if st.button(
-                f"Update Invoice {selected_invoice_id} for {data['Customer Name']}"
-            ):
-                action_date_str = action_date.strftime("%Y-%m-%d")
-                update_invoice(selected_invoice_id, note, action_date_str, abc_params)
-        else:
-            st.warning("No invoice found with that ID")
 
-        col1, col2 = st.columns([1, 1])
+        with col3:
+            try:
+                action_date = st.date_input(
+                    "**Action Date**", pd.to_datetime(data["Action Date"])
+                )
+            except:
+                placeholder_date = date.today() + timedelta(days=90)
+                action_date = st.date_input("Action Date", placeholder_date)
+                st.warning(
+                    "Action date automatically changed to 3 months from today, updated as needed"
+                )
 
-        all_data = fetch_all_data(abc_params)
-        all_data.sort_values(by="Action Date", ascending=False, inplace=True)
-        blank_note_rows = (all_data["Note"].str.strip() == "").sum()
-        # col1.subheader(f"Invoice Records ({blank_note_rows} Customers Not Yet Contacted)")
-        # Create the subheader with custom formatting
-        col1.markdown(
-            f"### Invoice Records (<span style='color:red;'>{blank_note_rows} Customers Not Yet Contacted</span>)",
+        note = st.text_area(
+            "**Enter a Note - Initials, Date, Note -- Add Each Note on a Separate Line!**",
+            data["Note"],
+        )
+        m = st.markdown(
+            """
+                    <style>
+                    div.stButton > button:first-child {
+                        background-color: #0099ff;
+                        color:#ffffff;
+                    }
+                    div.stButton > button:hover {
+                        background-color: #00ff00;
+                        color:#ff0000;
+                        }
+                    </style>""",
             unsafe_allow_html=True,
         )
+        if st.button(
+            f"Update Invoice {selected_invoice_id} for {data['Customer Name']}"
+        ):
+            action_date_str = action_date.strftime("%Y-%m-%d")
+            if update_invoice(selected_invoice_id, note, action_date_str, abc_params):
+                refresh_aging_summary(abc_params, [data["Customer Name"] or ""])
+                # The header and grid only depend on the table, so rerun the
+                # whole page once it has actually changed.
+                clear_invoice_cache()
+                st.session_state["invoice_updated"] = "Invoice Updated Successfully!"
+                st.rerun()
+    else:
+        st.warning("No invoice found with that ID")
+
+
+@st.fragment
+def invoice_records_header():
+    try:
+        all_data = load_invoice_records(abc_params)
+        file_data = load_invoice_records_excel(abc_params)
+    except Exception as e:
+        st.error(f"Error fetching all data: {e}")
+        return
+
+    col1, col2 = st.columns([1, 1])
+
+    blank_note_rows = (all_data["Note"].str.strip() == "").sum()
+    # col1.subheader(f"Invoice Records ({blank_note_rows} Customers Not Yet Contacted)")
+    # Create the subheader with custom formatting
+    col1.markdown(
+        f"### Invoice Records (<span style='color:red;'>{blank_note_rows} Customers Not Yet Contacted</span>)",
+        unsafe_allow_html=True,
+    )
+
+    today_str = date.today().strftime("%m-%d-%y")
+    filename = f"master_invoices_{today_str}.xlsx"
+    col2.download_button(
+        label="**Download**",
+        data=file_data,
+        file_name=filename,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+
+@st.fragment
+def invoice_records_grid():
+    try:
+        all_data = load_invoice_records(abc_params)
+        go = load_invoice_grid_options(abc_params)
+    except Exception as e:
+        st.error(f"Error fetching all data: {e}")
+        return
 
-        if all_data is not None:
-            all_data["Invoice"] = all_data["Invoice"].apply(
-                lambda x: "{:.0f}".format(x)
-            )
-            all_data["Action Date"] = all_data["Action Date"].apply(format_date)
-            all_data["Due Date"] = all_data["Due Date"].apply(format_date)
-            builder = GridOptionsBuilder.from_dataframe(all_data)
-            # Configure the column definitions for the GridOptionsBuilder instance.
-            builder.configure_column("Invoice", width=100)
-            builder.configure_column("Due Date", width=100)
-            builder.configure_column("Note", width=400)
-            builder.configure_column("Rows", width=80)
-            builder.configure_column("Action Date", width=120)
-            builder.configure_column("PO Number", width=150)
-            builder.configure_column("Total Amount", width=125)
-
-            # Build the GridOptions object.
-            go = builder.build()
-
-            # Create an AgGrid component using the GridOptions object and the all_data variable.
-            AgGrid(data=all_data, gridOptions=go)
+    # Create an AgGrid component using the GridOptions object and the all_data variable.
+    AgGrid(data=all_data, gridOptions=go)
 
-            today_str = date.today().strftime("%m-%d-%y")
-            filename = f"master_invoices_{today_str}.xlsx"
-            file_data = save_to_excel(all_data)
-            col2.download_button(
-                label="**Download**",
-                data=file_data,
-                file_name=filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
+
+def app_invoices_management():
+    st.title("Invoice Management")
+
+    # Each section is a fragment: widget interactions rerun only that section,
+    # while the cached records are shared until an update clears them.
+    invoice_editor()
+    invoice_records_header()
+    invoice_records_grid()
+
+
+def app_aging_report():
+    st.title("Aging Report")
+
+    refresh_aging_summary(abc_params, [])
+    report = fetch_aging_report(abc_params)
+    if report is not None:
+        buckets, customers, coverage = report
+
+        cols = st.columns(len(AGING_BUCKETS) + 1)
+        bucket_totals = buckets.set_index("Bucket")["Total Amount"]
+        for col, bucket in zip(cols, AGING_BUCKETS):
+            label = bucket if bucket in ("Current", "Undated") else f"{bucket} Days"
+            col.metric(label, f"${bucket_totals.get(bucket, 0):,.2f}")
+        if not coverage.empty and pd.notna(coverage.iloc[0]["Coverage"]):
+            cols[-1].metric("Contacted", f"{coverage.iloc[0]['Coverage']}%")
+
+        col1, col2 = st.columns([1, 1])
+        col1.subheader("Totals by Customer")
+        AgGrid(customers, columns_auto_size_mode=ColumnsAutoSizeMode.FIT_CONTENTS)
+
+        today_str = date.today().strftime("%m-%d-%y")
+        filename = f"aging_report_{today_str}.xlsx"
+        file_data = save_report_to_excel(
+            {
+                "Aging Buckets": buckets,
+                "By Customer": customers,
+                "Contact Coverage": coverage,
+            }
+        )
+        col2.download_button(
+            label="**Download**",
+            data=file_data,
+            file_name=filename,
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+
+def app_history():
+    st.title("History")
+
+    page_size = 100
+    tables = {
+        "Invoices": ("ABC_Invoices", "Invoice"),
+        "Quotes": ("Quotes", "Quote"),
+    }
+
+    col1, col2, col3 = st.columns([1, 1, 1])
+    table, key = tables[col1.selectbox("**Records**", list(tables.keys()))]
+
+    months = fetch_archive_months(table, abc_params)
+    if months is None:
+        return
+    if not months:
+        st.info("No records have been archived yet.")
+        return
+
+    month = col2.selectbox(
+        "**Archived In**",
+        months,
+        format_func=lambda m: f"{m // 100}-{m % 100:02d}",
+    )
+    total_rows = fetch_archive_count(table, month, abc_params)
+    if total_rows is None:
+        return
+    pages = max(1, -(-total_rows // page_size))
+    # Keyed on table and month so the page resets when either changes
+    page = col3.number_input(
+        "**Page**",
+        min_value=1,
+        max_value=pages,
+        value=1,
+        step=1,
+        key=f"history_page_{table}_{month}",
+    )
+
+    df = fetch_archive_page(table, key, month, page, page_size, abc_params)
+    if df is not None:
+        st.caption(f"Page {page} of {pages} ({total_rows} archived records)")
+        for column in ["Due Date", "Action Date"]:
+            if column in df.columns:
+                df[column] = df[column].apply(format_date)
+        AgGrid(df, columns_auto_size_mode=ColumnsAutoSizeMode.FIT_CONTENTS)
 
 
 apps = {
     "Invoices Management": app_invoices_management,
+    "Aging Report": app_aging_report,
     "Past Due Invoices": app_past_due_invoices,
     "Quotes Management": app_quotes_management,
     "Quotes Update": app_quotes_update,
+    "History": app_history,
 }
 
 # Example usage in app.py: